@@ -1,21 +1,18 @@
 # -*- coding: utf-8 -*-
 
-import colorsys
 from datetime import datetime
-from typing import List
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import sys
 import random as rnd
-# import math
 
-# from Bio import SeqRecord
-from dendropy import Tree
-from scipy.stats import percentileofscore
+import numpy as np
+from dendropy import Tree, AnnotationSet
 
 from parnas import parnas_logger
 from parnas.options import parser, parse_and_validate
-# from parnas.sequences import SequenceSimilarityMatrix
-from parnas.medoids import find_n_medoids, annotate_with_closest_centers, build_distance_functions, binarize_tree,\
-    get_costs, find_n_medoids_with_diversity, find_coverage
+from parnas.medoids import find_min_n_medoids, annotate_with_closest_centers, build_distance_functions,\
+    binarize_tree, get_costs, find_n_medoids_with_diversity, find_coverage, is_diversity_covered
 from parnas.medoids.medoid_utils import get_centers_score
 
 
@@ -23,60 +20,102 @@ from parnas.medoids.medoid_utils import get_centers_score
 sys.setrecursionlimit(100000)
 
 
+@lru_cache(maxsize=None)
+def _palette(n: int, has_prior: bool) -> Tuple[Tuple[str, ...], Optional[str]]:
+    """
+    Returns n distinct hex colors (one per center) and, if has_prior is set, an additional reserved prior color.
+    """
+    # Choose n different colors. If there are prior centers, add an additional reserved color.
+    n_colors = n + 1 if has_prior else n
+    # Vectorized HSV -> RGB conversion (same formula as colorsys.hsv_to_rgb) with fixed saturation and value.
+    s, v = 0.7, 0.7
+    h6 = np.arange(n_colors) / n_colors * 6.0
+    sector = h6.astype(np.int32)
+    f = h6 - sector
+    p = np.full(n_colors, v * (1.0 - s))
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    v_arr = np.full(n_colors, v)
+    in_sector = [sector % 6 == i for i in range(6)]
+    r = np.select(in_sector, [v_arr, q, p, p, t, v_arr])
+    g = np.select(in_sector, [t, v_arr, v_arr, q, p, p])
+    b = np.select(in_sector, [p, p, t, v_arr, v_arr, q])
+    rgb_colors = np.rint(255 * np.stack((r, g, b), axis=1)).astype(np.uint8)
+    hex_colors = tuple('#' + color.tobytes().hex() for color in rgb_colors)  # uint8 rows -> 6 hex digits.
+    if has_prior:
+        return hex_colors[1:], hex_colors[0]  # Reserve the first color for prior centers.
+    return hex_colors, None
+
+
+def _set_color(annotations: AnnotationSet, color: str):
+    """
+    Sets the '!color' annotation to the given color: updates an existing annotation in place or adds a new one.
+    """
+    color_annotation = annotations.find(name='!color')
+    if color_annotation is not None:
+        color_annotation.value = color
+    else:
+        annotations.add_new('!color', color)
+
+
 def color_by_clusters(tree: Tree, centers: List[str], prior_centers=None, fully_excluded=None, radius=None):
     # Annotate the tree nodes with the closest centers.
     annotate_with_closest_centers(tree, centers, prior_centers=prior_centers, radius=radius)
 
-    # Choose n different colors. If prior_centers list is not empty, add an additional reserved color.
-    n = len(centers) if not prior_centers else len(centers) + 1
-    hsv_colors = [(i / n, 0.7, 0.7) for i in range(n)]
-    rgb_colors = [colorsys.hsv_to_rgb(*hsv) for hsv in hsv_colors]
-    rgb_colors = [[round(255 * color[i]) for i in range(len(color))] for color in rgb_colors]
-    hex_colors = ['#%02x%02x%02x' % (color[0], color[1], color[2]) for color in rgb_colors]
-    if prior_centers:
-        prior_color = hex_colors[0]  # Reserve the first color for prior centers.
-        hex_colors = hex_colors[1:]
+    hex_colors, prior_color = _palette(len(centers), bool(prior_centers))
+
+    # Remove any previous color scheme in a single pass over the nodes and taxa.
+    # The same pass looks up the 'center' annotation of each node once (annotation lookups are linear scans).
+    node_center = {}
+    for node in tree.preorder_node_iter():
+        node.annotations.drop(name='!color')
+        node_center[node] = node.annotations.get_value('center')
+    for taxon in tree.taxon_namespace:
+        taxon.annotations.drop(name='!color')
 
-    # Color the edges.
+    # Color the edges. Colors are collected in a plain dict and written to the annotations once at the end.
+    node_color = {}
     for edge in tree.preorder_edge_iter():
-        if edge.head_node:
-            edge.head_node.annotations.drop(name='!color')  # remove any previous color scheme.
+        head = edge.head_node
+        tail = edge.tail_node
+        if head is None or tail is None:
+            continue
         # If the two ends of the edge are covered by the same center -- color it.
-        if edge.head_node and edge.tail_node and edge.head_node.annotations.get_value('center') is not None and\
-                edge.head_node.annotations.get_value('center') == edge.tail_node.annotations.get_value('center'):
-            if edge.head_node.annotations.get_value('center') < 0:  # negative if it is covered by a prior center.
-                edge.head_node.annotations.add_new('!color', prior_color)  # use the reserved color.
-            else:
-                center_ind = edge.head_node.annotations.get_value('center')
-                color = hex_colors[center_ind]
-                edge.head_node.annotations.add_new('!color', color)
-
-    # Drop previous color annotations and color 'regular' taxa black (to avoid color mixing in FigTree).
+        hc = node_center[head]
+        if hc is not None and hc == node_center[tail]:
+            # Negative if it is covered by a prior center -- use the reserved color.
+            node_color[head] = prior_color if hc < 0 else hex_colors[hc]
+    for node, color in node_color.items():
+        node.annotations.add_new('!color', color)  # Previous colors were stripped above.
+
+    # Color 'regular' taxa black (to avoid color mixing in FigTree).
     black = '#000000'
     grey = '#a9a9a9'
+    fully_excluded = frozenset(fully_excluded or ())
     special_taxa = centers
     if prior_centers:
         special_taxa = special_taxa + prior_centers
-    special_taxa = set(special_taxa)
+    special_taxa = {sys.intern(label) for label in special_taxa}  # Interned labels are matched by identity first.
+    label_to_taxon = {taxon.label: taxon for taxon in tree.taxon_namespace}
     for taxon in tree.taxon_namespace:
-        taxon.annotations.drop(name='!color')  # Remove any previous colors if any.
-        if not taxon.label in special_taxa:
-            if fully_excluded and taxon.label in fully_excluded:
-                taxon.annotations.add_new('!color', grey)
+        label = sys.intern(taxon.label)
+        if label not in special_taxa:
+            if label in fully_excluded:
+                _set_color(taxon.annotations, grey)
             else:
-                taxon.annotations.add_new('!color', black)
+                _set_color(taxon.annotations, black)
 
     # Color the centers.
     for center_ind, center in enumerate(centers):
-        taxon = tree.taxon_namespace.get_taxon(center)
+        taxon = label_to_taxon[center]
         color = hex_colors[center_ind]
-        taxon.annotations.add_new('!color', color)
+        _set_color(taxon.annotations, color)
 
     # Color prior centers if applicable.
     if prior_centers:
         for prior_center in prior_centers:
-            taxon = tree.taxon_namespace.get_taxon(prior_center)
-            taxon.annotations.add_new('!color', prior_color)
+            taxon = label_to_taxon[prior_center]
+            _set_color(taxon.annotations, prior_color)
 
 
 def save_clusters(clusters_path: str, tree: Tree, centers: List[str], prior_centers=None, fully_excluded=None,
@@ -84,9 +123,10 @@ def save_clusters(clusters_path: str, tree: Tree, centers: List[str], prior_cent
     if not annotated:
         annotate_with_closest_centers(tree, centers, prior_centers=prior_centers, radius=radius)
 
+    fully_excluded = frozenset(fully_excluded or ())
     clusters = {}
     for leaf in tree.leaf_nodes():  # Go through the annotations and collect clusters together.
-        if fully_excluded and leaf.taxon.label in fully_excluded:
+        if leaf.taxon.label in fully_excluded:
             continue
         if leaf.annotations.get_value('center') is not None and leaf.annotations.get_value('center') >= 0:
             center: int = leaf.annotations.get_value('center')
@@ -103,29 +143,6 @@ def save_clusters(clusters_path: str, tree: Tree, centers: List[str], prior_cent
     parnas_logger.info(f'Saved clusters to {clusters_path}')
 
 
-# def assess_clade_similarity(annotated_tree: Tree, centers: List[str], records: List[SeqRecord.SeqRecord],
-#                             sim_matrix: SequenceSimilarityMatrix):
-#     for i, center in enumerate(centers):
-#         print('Clade of %s:' % center)
-#         max_within_dist = 0
-#         min_outside_dist = math.inf
-#         for leaf1 in annotated_tree.leaf_nodes():
-#             if leaf1.taxon.label != center:
-#                 continue
-#             for leaf2 in annotated_tree.leaf_nodes():
-#                 leaf1_ind = [i for i, rec in enumerate(records) if rec.id == leaf1.taxon.label][0]
-#                 leaf2_ind = [i for i, rec in enumerate(records) if rec.id == leaf2.taxon.label][0]
-#                 dist = 1 - sim_matrix.matrix[leaf1_ind][leaf2_ind]
-#                 if leaf1.annotations.get_value('center') == i and leaf2.annotations.get_value('center') == i:
-#                     if dist > max_within_dist:
-#                         max_within_dist = dist
-#                 if leaf1.annotations.get_value('center') == i and leaf2.taxon.label in centers and leaf1 != leaf2:
-#                     if dist < min_outside_dist:
-#                         min_outside_dist = dist
-#         print('\tmax within clade: %.3f%%' % (max_within_dist * 100))
-#         print('\tclosest other representative: %.3f%%' % (min_outside_dist * 100))
-
-
 def run_parnas_cli():
     args, query_tree, n, radius, is_binary, prior_centers, excluded_taxa, obj_excluded, fully_excluded, taxa_weights = parse_and_validate()
 
@@ -139,7 +156,10 @@ def run_parnas_cli():
                                                   fully_excluded=fully_excluded + obj_excluded, radius=radius,
                                                   taxa_weights=taxa_weights)
         parnas_logger.info("Inferring best representatives...")
-        if not args.cover:
+        if is_diversity_covered(dist_functions):
+            # Nothing to cover (e.g., everything is covered by the prior centers) -- no need to run the DP.
+            representatives, value, diversity_scores = [], 0, []
+        elif not args.cover:
             representatives, value, diversity_scores, _ = find_n_medoids_with_diversity(query_tree, n, dist_functions,
                                                                                         cost_map, max_dist=radius)
         else:
@@ -148,19 +168,10 @@ def run_parnas_cli():
             if coverage is None:
                 parnas_logger.warning("The tree cannot be fully covered given the exclusion constraints.")
                 parnas_logger.warning("Falling back onto a slower method that would cover the tree as much as possible.")
-                opt_n = -1
-                prev_value = -1
-                for n in range(1, len(query_tree.leaf_nodes()) + 1):
-                    representatives, value = find_n_medoids(query_tree, n, dist_functions, cost_map, max_dist=radius)
-                    if value == prev_value:
-                        # The best possible value was achieved on the previous n (full coverage is impossible).
-                        opt_n = n - 1
-                        break
-                    elif value == 0:
-                        # Achieved full coverage.
-                        opt_n = n
-                        break
-                    prev_value = value
+                # The search starts from n = 1: a tree with no diversity left to cover (e.g., everything is covered
+                # by the prior centers) never gets here because of the is_diversity_covered check above.
+                representatives, value = find_min_n_medoids(query_tree, dist_functions, cost_map, max_dist=radius,
+                                                            processes=args.processes)
             else:
                 representatives = coverage
 
@@ -216,13 +227,6 @@ def run_parnas_cli():
                 taxon.annotations.drop(name='!color')
             sample_tree.write(path=args.sample_tree_path, schema='nexus')
             parnas_logger.info('The subtree was saved to "%s".' % args.sample_tree_path)
-
-            # if args.nt_alignment:
-            #     # Parsing assuming its swIAV HA sequences.
-            #     alignment_path = args.nt_alignment
-            #     records = list(SeqIO.parse(alignment_path, 'fasta'))
-            #     sim_matrix = SequenceSimilarityMatrix(None, None, records, records, aligned=True, ignore_tails=True, nt_alphabet=True)
-            #     assess_clade_similarity(query_tree, representatives, records, sim_matrix)
     else:
         # The procedure for evaluating the prior centers.
         dist_functions = build_distance_functions(query_tree, is_binary=is_binary,
@@ -267,10 +271,11 @@ def run_parnas_cli():
                                f'as representative as the best one.')
 
         # Compare prior to random sets.
+        from scipy.stats import percentileofscore  # scipy.stats is slow to import and only needed here.
         replicates = 1000
         parnas_logger.info(f'Comparing the prior representatives with random reps ({replicates} replicates)...')
-        taxa_labels = [leaf.taxon.label for leaf in query_tree.leaf_nodes() if
-                       leaf.taxon.label not in fully_excluded and leaf.taxon.label not in excluded_taxa]
+        not_rep_taxa = frozenset(fully_excluded).union(excluded_taxa)
+        taxa_labels = [leaf.taxon.label for leaf in query_tree.leaf_nodes() if leaf.taxon.label not in not_rep_taxa]
         rnd_scores = []
         for i in range(replicates):
             rnd.shuffle(taxa_labels)
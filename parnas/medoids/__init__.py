@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 
-from .tree_medoids import find_n_medoids, find_n_medoids_with_diversity, find_coverage
-from .medoid_utils import annotate_with_closest_centers, build_distance_functions, binarize_tree, get_costs
+from .tree_medoids import find_n_medoids, find_min_n_medoids, find_n_medoids_with_diversity, find_coverage
+from .medoid_utils import annotate_with_closest_centers, build_distance_functions, binarize_tree, get_costs,\
+    is_diversity_covered
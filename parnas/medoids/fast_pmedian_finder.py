@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 from collections import deque
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import numpy as np
 from dendropy import Tree, Node
@@ -55,7 +55,8 @@ class FastPMedianFinder(object):
         self.G = np.array([], dtype=np.float64)
         self.F = np.array([], dtype=np.float64)
 
-    def find_medoids(self, p: int, distance_functions: Dict[Node, DistFunction], cost_map: Dict[str, float]):
+    def find_medoids(self, p: int, distance_functions: Dict[Node, DistFunction], cost_map: Dict[str, float],
+                     with_medoids=True):
         parnas_logger.debug(f'Started find_medoids {datetime.now().strftime("%H:%M:%S")}')
         self.distance_functions = distance_functions
         self.cost_map = cost_map
@@ -75,20 +76,29 @@ class FastPMedianFinder(object):
         self.G, self.F = pmedian_jit.run_dp()
         parnas_logger.debug(f'Finished DP {datetime.now().strftime("%H:%M:%S")}')
 
+        obj_value, median_names = self.get_solution(self.n_c, with_medoids)
+        parnas_logger.debug(f'Optimal objective function: {obj_value}')
+        return obj_value, median_names
+
+    def get_solution(self, k: int, with_medoids=True) -> Tuple[float, Optional[List[str]]]:
+        """
+        Reads the objective function value for k medoids (k <= p of the last find_medoids run) from the DP matrix.
+        If with_medoids is set, also backtracks the medoids; otherwise None is returned instead of the medoids.
+        """
         root_ind = self.tree.seed_node.index
-        min_index = int(np.argmin(self.G[root_ind][self.n_c]))
-        if self.G[root_ind][self.n_c][min_index] < self.G[root_ind][0][self.nleaves - 1]:
-            obj_value = self.G[root_ind][self.n_c][min_index]
-            radius_id = self.leaf_lists[root_ind, min_index]
-            median_names = self.backtrack(root_ind, self.n_c, radius_id)
-            # median_names = [node.taxon.label for node in median_nodes]
-            parnas_logger.debug(f'Finished Backtracking {datetime.now().strftime("%H:%M:%S")}')
+        min_index = int(np.argmin(self.G[root_ind][k]))
+        if self.G[root_ind][k][min_index] < self.G[root_ind][0][self.nleaves - 1]:
+            obj_value = self.G[root_ind][k][min_index]
+            median_names = None
+            if with_medoids:
+                radius_id = self.leaf_lists[root_ind, min_index]
+                median_names = self.backtrack(root_ind, k, radius_id)
+                # median_names = [node.taxon.label for node in median_nodes]
+                parnas_logger.debug(f'Finished Backtracking {datetime.now().strftime("%H:%M:%S")}')
         else:
             # No new medoids are really needed in this case.
             obj_value = self.G[root_ind][0][self.nleaves - 1]
             median_names = []
-
-        parnas_logger.debug(f'Optimal objective function: {obj_value}')
         return obj_value, median_names
 
     def get_score(self, k: int) -> Optional[float]:
@@ -1,7 +1,6 @@
 # -*- coding: utf-8 -*-
 from typing import List, Dict, Tuple
 from dendropy import Tree, Node, Taxon
-from Bio.Phylo import BaseTree
 import math
 
 
@@ -102,10 +101,11 @@ def build_distance_functions(tree: Tree, radius=None, is_binary=False, prior_cen
         # For each leaf label stores the distance to the closest prior center:
         closest_prior_dist = dict([(leaf.taxon.label, closest_centers[leaf][1]) for leaf in tree.leaf_nodes()])
 
+    fully_excluded = frozenset(fully_excluded or ())  # Hashed membership tests in the loop below.
     distance_functions = {}
     for node in tree.preorder_node_iter():
         if node.is_leaf():
-            excluded = (node.taxon.label in fully_excluded) if fully_excluded else False  # If excluded, dist function is 0.
+            excluded = node.taxon.label in fully_excluded  # If excluded, dist function is 0.
             weight = taxa_weights.get(node.taxon.label, 1) if taxa_weights else 1  # default weight is 1.
             max_dist = closest_prior_dist[node.taxon.label] if prior_centers else math.inf
             min_dist = radius if radius else 0
@@ -121,10 +121,21 @@ def build_distance_functions(tree: Tree, radius=None, is_binary=False, prior_cen
     return distance_functions
 
 
+def is_diversity_covered(distance_functions: Dict[Node, DistFunction]) -> bool:
+    """
+    Checks if there is no diversity left to cover, i.e., all distance functions are zero
+    (e.g., all leaves are excluded or are within the radius from the prior centers).
+    In that case the objective function is 0 for any set of representatives.
+    """
+    return all(function.is_zero for function in distance_functions.values())
+
+
 def get_costs(tree: Tree, excluded=None, fully_excluded=None) -> Dict[str, float]:
+    excluded = frozenset(excluded or ())
+    fully_excluded = frozenset(fully_excluded or ())
     cost_map = {}
     for taxon in tree.taxon_namespace:
-        if (excluded and taxon.label in excluded) or (fully_excluded and taxon.label in fully_excluded):
+        if taxon.label in excluded or taxon.label in fully_excluded:
             cost_map[taxon.label] = math.inf
         else:
             cost_map[taxon.label] = 0
@@ -1,4 +1,9 @@
 # -*- coding: utf-8 -*-
+import math
+import multiprocessing
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from typing import List, Tuple, Dict, Optional
 from dendropy import Tree
 
@@ -29,6 +34,147 @@ def find_n_medoids(tree: Tree, n: int, distance_functions: Dict, cost_map: Dict[
     return medoids, objective
 
 
+def _find_n_objectives(medoid_finder: FastPMedianFinder, n: int, distance_functions: Dict,
+                       cost_map: Dict[str, float]) -> Tuple[float, Optional[float]]:
+    """
+    Returns the objective function values for n and n - 1 medoids (None for n = 1) from a single DP run.
+    """
+    objective, _ = medoid_finder.find_medoids(n, distance_functions, cost_map, with_medoids=False)
+    return objective, medoid_finder.get_solution(n - 1, with_medoids=False)[0] if n > 1 else None
+
+
+# State of a worker process of find_min_n_medoids: a medoid finder for the tree, distance functions, and costs.
+_worker_state: Optional[Tuple[FastPMedianFinder, Dict, Dict[str, float]]] = None
+
+
+def _init_worker(tree: Tree, distance_functions: Dict, cost_map: Dict[str, float]):
+    global _worker_state
+    _worker_state = (FastPMedianFinder(tree), distance_functions, cost_map)
+
+
+def _find_worker_n_objectives(n: int) -> Tuple[float, Optional[float]]:
+    medoid_finder, distance_functions, cost_map = _worker_state
+    return _find_n_objectives(medoid_finder, n, distance_functions, cost_map)
+
+
+def find_min_n_medoids(tree: Tree, distance_functions: Dict, cost_map: Dict[str, float], max_dist=None,
+                       processes=1) -> Tuple[List[str], float]:
+    """
+    Finds the smallest n, for which n medoids cover all the diversity (objective is 0) or the objective stops
+    decreasing (e.g., if full coverage is impossible due to exclusions), and returns the respective medoids.
+    n is bounded by the number of leaves that can be chosen as medoids (finite cost): choosing all of them already
+    achieves the minimal objective, so a larger n cannot improve it. Below that bound the objective does not increase
+    with n, so n is found by doubling and binary search instead of trying every n.
+    A single DP run for n gives the objective values for n and n - 1, so each probed n costs one run. The values are
+    memoized, and the medoids are backtracked only for the returned n.
+
+    :param processes: if more than 1, the values of n that the search may probe next are solved ahead in a pool of
+                      worker processes. The search itself (and the result) is the same for any number of processes.
+    :return: (1) a list of tip labels that have been chosen as representatives;
+             (2) the objective function value.
+    """
+    # Number of leaves that can be chosen as medoids (excluded leaves have an infinite cost):
+    max_n = max(1, sum(1 for leaf in tree.leaf_node_iter() if cost_map[leaf.taxon.label] < math.inf))
+    medoid_finder = FastPMedianFinder(tree)  # Indexes the tree and allocates the lookup arrays only once.
+    objectives: Dict[int, float] = {}
+    batch_size = max(1, processes)  # Number of n to prefetch at once (one per worker).
+    executor: Optional[ProcessPoolExecutor] = None
+    # n_c, G, and F of the largest DP run in this process (the final medoids are backtracked from it):
+    largest_run: Optional[Tuple] = None
+
+    def store(k: int, k_value: float, prev_value: Optional[float]):
+        objectives[k] = k_value
+        if prev_value is not None:
+            objectives.setdefault(k - 1, prev_value)
+
+    def is_solved(k: int) -> bool:
+        # The values for k and k - 1 are known.
+        return k in objectives and (k == 1 or k - 1 in objectives)
+
+    def solve_all(ks: List[int]):
+        # Solves (at once) each k that is not solved yet.
+        nonlocal executor, largest_run
+        to_solve = sorted({k for k in ks if not is_solved(k)})
+        if processes > 1 and len(to_solve) > 1:
+            if executor is None:
+                # On Linux, forked workers inherit the JIT-compiled DP and the tree without pickling.
+                # Elsewhere, the platform default is kept (fork is unsafe on macOS), and each worker compiles
+                # the DP and receives the tree once.
+                fork_context = multiprocessing.get_context('fork') if sys.platform.startswith('linux') else None
+                executor = ProcessPoolExecutor(max_workers=processes, mp_context=fork_context,
+                                               initializer=_init_worker,
+                                               initargs=(tree, distance_functions, cost_map))
+            futures = {executor.submit(_find_worker_n_objectives, k): k for k in to_solve}
+            for future in as_completed(futures):
+                store(futures[future], *future.result())
+        else:
+            for k in to_solve:
+                store(k, *_find_n_objectives(medoid_finder, k, distance_functions, cost_map))
+                if largest_run is None or medoid_finder.n_c > largest_run[0]:
+                    largest_run = (medoid_finder.n_c, medoid_finder.G, medoid_finder.F)
+
+    def is_final(k: int) -> bool:
+        # Achieved full coverage or the best possible value was achieved on k - 1.
+        # An infinite value means there is no valid solution for k (it is never final).
+        k_value = objectives[k]
+        if k_value == math.inf:
+            return False
+        return k_value == 0 or (k > 1 and k_value == objectives[k - 1])
+
+    def bisection_candidates(lo: int, hi: int) -> List[int]:
+        # Up to batch_size unsolved midpoints that the binary search on (lo, hi) may probe next (breadth-first).
+        candidates = []
+        ranges = deque([(lo, hi)])
+        while ranges and len(candidates) < batch_size:
+            range_lo, range_hi = ranges.popleft()
+            if range_hi - range_lo > 1:
+                mid = (range_lo + range_hi) // 2
+                if not is_solved(mid):
+                    candidates.append(mid)
+                ranges.extend([(range_lo, mid), (mid, range_hi)])
+        return candidates
+
+    try:
+        # Solve n = 1 in this process first, so that forked workers inherit the JIT-compiled DP.
+        solve_all([1])
+        # Invariant: lo is not final (or 0); hi is final or equals max_n.
+        lo, hi = 0, 1
+        while hi < max_n:
+            if processes > 1:
+                # Prefetch the next unsolved doubling steps (only n < max_n are probed).
+                candidates = []
+                k = hi
+                while k < max_n and len(candidates) < batch_size:
+                    if not is_solved(k):
+                        candidates.append(k)
+                    k *= 2
+                solve_all(candidates)
+            solve_all([hi])
+            if is_final(hi):
+                break
+            lo, hi = hi, min(2 * hi, max_n)
+        while hi - lo > 1:
+            if processes > 1:
+                solve_all(bisection_candidates(lo, hi))
+            mid = (lo + hi) // 2
+            solve_all([mid])
+            if is_final(mid):
+                hi = mid
+            else:
+                lo = mid
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    # Backtrack the medoids for the chosen n (from the largest DP run, if it was in this process and covered hi).
+    # The other lookups of the finder do not depend on n, so only the DP matrices need to be restored.
+    if largest_run is not None and largest_run[0] >= hi:
+        medoid_finder.n_c, medoid_finder.G, medoid_finder.F = largest_run
+        objective, medoids = medoid_finder.get_solution(hi)
+    else:
+        objective, medoids = medoid_finder.find_medoids(hi, distance_functions, cost_map)
+    return medoids, objective
+
+
 def find_n_medoids_with_diversity(tree: Tree, n: int, distance_functions: Dict, cost_map: Dict[str, float], max_dist=None)\
         -> Tuple[List[str], float, List[float], float]:
     """
@@ -43,6 +43,10 @@ parser.add_argument('--cover', action='store_true',
                     help="Choose the best representatives (smallest number) that cover all the tips within the specified radius/threshold.\n" +
                     "If specified, a --radius or --threshold argument must be specified as well.",
                     required=False)
+parser.add_argument('--processes', type=int, action='store', dest='processes', default=1,
+                    help='Number of processes to use with --cover when the tree cannot be fully covered '
+                         '(several numbers of representatives are then tried in parallel). Default: 1.',
+                    required=False)
 parser.add_argument('--binary', action='store_true',
                     help="To be used with --radius. Instead of covering as much diversity as possible, "
                          "PARNAS will cover as many tips as possible within the radius. "
@@ -306,6 +310,8 @@ def parse_and_validate():
     if args.cover:
         if not args.percent and not args.radius:
             parser.error('To use --cover parameter, please specify --threshold or --radius option.')
+    if args.processes < 1:
+        parser.error('--processes should be at least 1.')
 
     # Validate weights.
     taxa_weights = None
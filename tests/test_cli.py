@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+import colorsys
+import unittest
+
+from parnas.cli import _palette
+
+
+def colorsys_palette(n, has_prior):
+    # Reference for _palette: the colorsys-based conversion it replaces.
+    n_colors = n + 1 if has_prior else n
+    rgb_colors = [colorsys.hsv_to_rgb(i / n_colors, 0.7, 0.7) for i in range(n_colors)]
+    hex_colors = tuple('#%02x%02x%02x' % tuple(round(255 * c) for c in color) for color in rgb_colors)
+    if has_prior:
+        return hex_colors[1:], hex_colors[0]
+    return hex_colors, None
+
+
+class TestCli(unittest.TestCase):
+
+    def test_palette_matches_colorsys(self):
+        for n in list(range(0, 50)) + [97, 256, 1000]:
+            for has_prior in [False, True]:
+                self.assertEqual(_palette(n, has_prior), colorsys_palette(n, has_prior))
+
+    def test_palette_prior_color(self):
+        colors, prior_color = _palette(3, True)
+        self.assertEqual(len(colors), 3)
+        self.assertNotIn(prior_color, colors)
+        self.assertEqual(_palette(0, True), ((), prior_color))
+        self.assertEqual(_palette(1, False), (('#b23636',), None))
+
+
+if __name__ == '__main__':
+    unittest.main()
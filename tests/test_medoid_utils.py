@@ -3,7 +3,7 @@
 import unittest
 from dendropy import Tree
 
-from parnas.medoids.medoid_utils import binarize_tree
+from parnas.medoids.medoid_utils import binarize_tree, build_distance_functions, is_diversity_covered
 from parnas.medoids.pmedian_utils import filtered_preorder_iterator, filtered_postorder_iterator
 
 
@@ -39,6 +39,14 @@ class TestMedoidUtils(unittest.TestCase):
         expected_preorder = 'cdn2n3efn4gn5n6'
         self.assertEqual(expected_preorder, postorder)
 
+    def test_is_diversity_covered(self):
+        tree = Tree.get(data='((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);', schema='newick')
+        self.assertFalse(is_diversity_covered(build_distance_functions(tree)))
+        # Everything is within the radius from a and f:
+        self.assertTrue(is_diversity_covered(build_distance_functions(tree, radius=6, prior_centers=['a', 'f'])))
+        self.assertFalse(is_diversity_covered(build_distance_functions(tree, radius=2, prior_centers=['a', 'f'])))
+        self.assertTrue(is_diversity_covered(build_distance_functions(tree, fully_excluded=list('abcdef'))))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,25 @@
 # -*- coding: utf-8 -*-
 
+import math
 import unittest
+from unittest import mock
 from dendropy import Tree
 
-from parnas.medoids import find_n_medoids, build_distance_functions, get_costs, find_n_medoids_with_diversity
+from parnas.medoids import find_n_medoids, build_distance_functions, get_costs, find_n_medoids_with_diversity,\
+    find_min_n_medoids, binarize_tree
+from parnas.medoids.fast_pmedian_finder import FastPMedianFinder
+
+
+def linear_min_n_medoids(tree, distance_funcs, cost_map, radius):
+    # Reference for find_min_n_medoids: tries every n up to the number of leaves that can be chosen.
+    max_n = sum(1 for leaf in tree.leaf_nodes() if cost_map[leaf.taxon.label] < math.inf)
+    prev_value = -1
+    for n in range(1, max_n + 1):
+        medoids, value = find_n_medoids(tree, n, distance_funcs, cost_map, max_dist=radius)
+        if value == 0 or value == prev_value:
+            break
+        prev_value = value
+    return medoids, value
 
 
 class TestTreeMedoids(unittest.TestCase):
@@ -123,6 +139,118 @@ class TestTreeMedoids(unittest.TestCase):
         self.assertAlmostEqual(obj, 11.5, 10)
         self.assertEqual(medoids[0], 'c')
 
+    def test_min_n_medoids_full_coverage(self):
+        tree = Tree.get(data="((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", schema='newick')
+        radius = 4.5  # two medoids leave f uncovered, three medoids cover everything.
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree)
+        medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+        self.assertEqual(obj, 0)
+        self.assertEqual(set(medoids), {'a', 'd', 'f'})
+
+    def test_min_n_medoids_partial_coverage(self):
+        tree = Tree.get(data="((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", schema='newick')
+        radius = 2  # b, c, and f cannot be chosen, so the tree cannot be fully covered.
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree, excluded=['b', 'c', 'f'])
+        medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+        self.assertEqual(obj, 8)
+        self.assertEqual(set(medoids), {'a', 'd', 'e'})
+
+    def test_solution_from_larger_run(self):
+        # find_min_n_medoids reads the values for n - 1 (and the medoids for the chosen n) from a run for a larger n.
+        tree = Tree.get(data="((T5:0.5,T3:0.5):1.0,((T6:2.0,(T1:1.0,(T4:1.5,T2:3.0):1.0):1.0):0.5,"
+                             "((T7:2.0,T9:2.0):0.5,T8:2.0):1.0):1.0);", schema='newick')
+        binarize_tree(tree)
+        radius = 2.5
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree, excluded=['T1', 'T4', 'T7'])
+        medoid_finder = FastPMedianFinder(tree)
+        medoid_finder.find_medoids(7, distance_funcs, cost_map, with_medoids=False)
+        for n in range(1, 8):
+            medoids, obj = find_n_medoids(tree, n, distance_funcs, cost_map, max_dist=radius)
+            self.assertEqual(medoid_finder.get_solution(n), (obj, medoids))
+            self.assertEqual(medoid_finder.get_solution(n, with_medoids=False)[0], obj)
+
+    def test_min_n_medoids_exclusion_cap(self):
+        # Only 6 leaves can be chosen, and choosing all of them already achieves the minimal objective, so n <= 6.
+        tree = Tree.get(data="((T5:0.5,T3:0.5):1.0,((T6:2.0,(T1:1.0,(T4:1.5,T2:3.0):1.0):1.0):0.5,"
+                             "((T7:2.0,T9:2.0):0.5,T8:2.0):1.0):1.0);", schema='newick')
+        binarize_tree(tree)
+        radius = 2.5  # The objective for n = 1..9 is 24, 17, 10.5, 7, 5, 5, 5, inf, inf.
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree, excluded=['T1', 'T4', 'T7'])
+        medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+        self.assertEqual(obj, 5)
+        self.assertEqual(set(medoids), {'T2', 'T5', 'T6', 'T8', 'T9'})
+
+    def test_min_n_medoids_matches_linear_search(self):
+        cases = [
+            # Full coverage with 3 medoids.
+            ("((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", [], 4.5),
+            # 3 of 6 leaves can be chosen.
+            ("((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", ['b', 'c', 'f'], 2),
+            # The objective plateaus at n = 4..7 (below the 6 selectable leaves), while doubling probes n = 8.
+            ("((((T1:1.0,T5:0.5):2.0,T3:1.5):2.0,(T8:0.5,T6:1.0):2.0):1.0,((T9:3.0,(T2:2.0,T7:0.5):2.0):2.0,"
+             "T4:2.0):0.5);", ['T4', 'T9', 'T7'], 2),
+            # No plateau below the 6 selectable leaves.
+            ("(T3:0.5,((T5:1.0,T2:0.5):0.5,((T8:3.0,T6:1.5):2.0,((T9:1.0,(T1:0.5,T4:1.5):1.0):2.0,T7:1.5):1.0):1.0)"
+             ":2.0);", ['T4', 'T1', 'T2'], 2),
+        ]
+        for newick, excluded, radius in cases:
+            tree = Tree.get(data=newick, schema='newick')
+            binarize_tree(tree)
+            distance_funcs = build_distance_functions(tree, radius=radius)
+            cost_map = get_costs(tree, excluded=excluded)
+            expected_medoids, expected_obj = linear_min_n_medoids(tree, distance_funcs, cost_map, radius)
+            medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+            self.assertEqual(obj, expected_obj)
+            self.assertEqual(set(medoids), set(expected_medoids))
+
+    def test_min_n_medoids_serial_probes(self):
+        # Two medoids cover the tree, so the serial search solves n = 1, 2 and does not probe n = 4 ahead.
+        tree = Tree.get(data="((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", schema='newick')
+        radius = 5
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree)
+        with mock.patch.object(FastPMedianFinder, 'find_medoids', autospec=True,
+                               side_effect=FastPMedianFinder.find_medoids) as find_medoids:
+            medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+        self.assertEqual(obj, 0)
+        self.assertEqual(set(medoids), {'a', 'd'})
+        self.assertEqual([call.args[1] for call in find_medoids.call_args_list], [1, 2])
+
+    def test_min_n_medoids_parallel(self):
+        tree = Tree.get(data="((a:1,(b:2.5,c:2.5):1):3,(d:0.5,(e:2.5,f:3.5):1):2);", schema='newick')
+        radius = 4.5
+        distance_funcs = build_distance_functions(tree, radius=radius)
+        cost_map = get_costs(tree)
+        medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius, processes=4)
+        self.assertEqual(obj, 0)
+        self.assertEqual(set(medoids), {'a', 'd', 'f'})
+
+    def test_min_n_medoids_parallel_matches_serial(self):
+        # Trees with exclusions, where the objective plateaus or becomes inf past the selectable leaves.
+        cases = [
+            ("((T5:0.5,T3:0.5):1.0,((T6:2.0,(T1:1.0,(T4:1.5,T2:3.0):1.0):1.0):0.5,((T7:2.0,T9:2.0):0.5,T8:2.0)"
+             ":1.0):1.0);", ['T1', 'T4', 'T7'], 2.5),
+            ("((((T1:1.0,T5:0.5):2.0,T3:1.5):2.0,(T8:0.5,T6:1.0):2.0):1.0,((T9:3.0,(T2:2.0,T7:0.5):2.0):2.0,"
+             "T4:2.0):0.5);", ['T4', 'T9', 'T7'], 2),
+            ("(T3:0.5,((T5:1.0,T2:0.5):0.5,((T8:3.0,T6:1.5):2.0,((T9:1.0,(T1:0.5,T4:1.5):1.0):2.0,T7:1.5):1.0):1.0)"
+             ":2.0);", ['T4', 'T1', 'T2'], 2),
+        ]
+        for newick, excluded, radius in cases:
+            tree = Tree.get(data=newick, schema='newick')
+            binarize_tree(tree)
+            distance_funcs = build_distance_functions(tree, radius=radius)
+            cost_map = get_costs(tree, excluded=excluded)
+            expected_medoids, expected_obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius)
+            for processes in [2, 4, 8]:
+                medoids, obj = find_min_n_medoids(tree, distance_funcs, cost_map, max_dist=radius,
+                                                  processes=processes)
+                self.assertEqual(obj, expected_obj)
+                self.assertEqual(set(medoids), set(expected_medoids))
+
 
 if __name__ == '__main__':
     unittest.main()